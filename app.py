@@ -4,12 +4,19 @@ University Timetable Optimizer - Main Application
 import streamlit as st
 import json
 import os
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from functools import partial
 from src.models.timetable import Timetable, Course, Lecturer, TimeSlot
 from src.algorithms.pso import PSO
 from src.algorithms.genetic import GeneticAlgorithm, GeneticAlgorithmConfig
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
 # Set page config
 st.set_page_config(
     page_title="University Timetable Optimizer",
@@ -26,16 +33,33 @@ def get_time_for_period(period):
     time = START_TIME + timedelta(minutes=period * SLOT_DURATION)
     return time.strftime("%H:%M")
 
+@st.cache_data
+def _read_json(path, mtime):
+    """Read a JSON file; mtime is part of the cache key so edits invalidate it"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read()) if orjson else json.load(f)
+
+def read_json(path):
+    """Read a JSON file, cached across Streamlit reruns until the file changes"""
+    return _read_json(path, os.path.getmtime(path))
+
+def write_json(path, data, indent=True):
+    """Write a JSON file, indented for the human-edited data files"""
+    if orjson:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=option))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2 if indent else None)
+
 def load_data():
     """Load courses and lecturers from JSON files"""
     try:
-        with open('data/courses.json', 'r') as f:
-            courses_data = json.load(f)
-        with open('data/lecturers.json', 'r') as f:
-            lecturers_data = json.load(f)
+        courses_data = read_json('data/courses.json')
+        lecturers_data = read_json('data/lecturers.json')
         try:
-            with open('results/best_timetable.json', 'r') as f:
-                saved_timetable = json.load(f)
+            saved_timetable = read_json('results/best_timetable.json')
         except FileNotFoundError:
             saved_timetable = {}
     except FileNotFoundError:
@@ -58,7 +82,10 @@ def load_data():
     return courses, lecturers, rooms
 
 def save_data(courses, lecturers, saved_timetable=None):
-    """Save courses and lecturers to JSON files"""
+    """Save courses and lecturers to JSON files
+    
+    The saved timetable is only rewritten when passed, i.e. when it has changed.
+    """
     courses_data = [{"id": c.id, "name": c.name, "duration": c.duration,
                      "required_rooms": c.required_rooms, "lecturer": c.lecturer}
                     for c in courses]
@@ -66,70 +93,76 @@ def save_data(courses, lecturers, saved_timetable=None):
                       for l in lecturers]
     
     os.makedirs('data', exist_ok=True)
-    with open('data/courses.json', 'w') as f:
-        json.dump(courses_data, f, indent=4)
-    with open('data/lecturers.json', 'w') as f:
-        json.dump(lecturers_data, f, indent=4)
-    if saved_timetable:
+    write_json('data/courses.json', courses_data)
+    write_json('data/lecturers.json', lecturers_data)
+    if saved_timetable is not None:
         os.makedirs('results', exist_ok=True)
-        with open('results/best_timetable.json', 'w') as f:
-            json.dump(saved_timetable, f, indent=4)
+        write_json('results/best_timetable.json', saved_timetable, indent=False)
+    _read_json.clear()
 
 def create_fitness_function(timetable):
-    """Create a fitness function for the optimization algorithms"""
-    def fitness_function(solution):
-        if len(solution) != sum(course.duration * 3 for course in timetable.courses):
-            raise ValueError(f"Solution array length ({len(solution)}) does not match required length")
-        try:
-            timetable.schedule = decode_solution(solution, timetable.courses)
-            return timetable.get_fitness()
-        except Exception as e:
-            st.error(f"Error in fitness calculation: {str(e)}")
-            return float('inf')
-    return fitness_function
+    """Create a fitness function for the optimization algorithms
+    
+    The returned function accepts a single solution or a (n, solution_size) batch.
+    It is a partial of a module-level function, so it can be pickled to worker processes.
+    """
+    return partial(evaluate_solution, timetable)
+
+def evaluate_solution(timetable, solution):
+    """Calculate the fitness of a single solution or a batch of solutions
+    
+    Solutions are int8 chromosomes (GA) or float positions (PSO), which are rounded.
+    """
+    solution = np.asarray(solution)
+    solution_size = timetable.solution_size
+    if solution.shape[-1] != solution_size:
+        raise ValueError(f"Solution array length ({solution.shape[-1]}) does not match required length")
+    batch = solution.reshape(-1, solution_size)
+    try:
+        fitness = timetable.batch_fitness(batch)
+    except Exception as e:
+        st.error(f"Error in fitness calculation: {str(e)}")
+        fitness = np.full(len(batch), float('inf'))
+    return fitness if solution.ndim == 2 else float(fitness[0])
 
-def decode_solution(solution, courses):
-    """Decode the solution array into a timetable"""
-    if len(solution) != sum(course.duration * 3 for course in courses):
+def decode_solution(solution, timetable):
+    """Decode the solution array into a timetable
+    
+    Uses the timetable's course offsets and grid (days, periods per day, rooms), so the
+    decoded schedule is the one Timetable.batch_fitness scored.
+    """
+    offsets = timetable.course_offsets
+    if len(solution) != timetable.solution_size:
         raise ValueError(f"Solution array length ({len(solution)}) does not match required length")
     
-    timetable = {}
-    current_index = 0
+    solution = np.asarray(solution)
+    if not np.issubdtype(solution.dtype, np.integer):
+        solution = np.rint(solution)  # PSO positions are continuous
     
-    for course in courses:
-        slots = []
-        for _ in range(course.duration):
-            if current_index + 2 >= len(solution):
-                raise ValueError(f"Solution array too short for course {course.id}")
-            
-            day = int(round(solution[current_index])) % 5
-            period = int(round(solution[current_index + 1])) % 8
-            room = int(round(solution[current_index + 2])) % 8
-            
-            slot = TimeSlot(day=day, period=period, room=room)
-            slots.append(slot)
-            current_index += 3
-        
-        slots.sort(key=lambda x: (x.day, x.period))
-        timetable[course.id] = slots
+    # One (day, period, room index) row per slot, in course order
+    grid = (timetable.days, timetable.periods_per_day, len(timetable.rooms))
+    slots = solution.astype(np.int64, copy=False).reshape(-1, 3) % grid
+    
+    schedule = {}
+    for course, start, end in zip(timetable.courses, offsets[:-1], offsets[1:]):
+        course_slots = slots[start:end]
+        order = np.lexsort((course_slots[:, 1], course_slots[:, 0]))
+        schedule[course.id] = [TimeSlot(day=day, period=period, room=timetable.rooms[room])
+                               for day, period, room in course_slots[order].tolist()]
     
-    return timetable
+    return schedule
 
 def convert_schedule_to_json(schedule):
-    """Convert schedule with TimeSlot objects to JSON-serializable format"""
-    json_schedule = {}
-    for course_id, slots in schedule.items():
-        json_schedule[course_id] = [
-            {
-                'day': slot.day,
-                'period': slot.period,
-                'room': slot.room
-            }
-            for slot in slots
-        ]
-    return json_schedule
+    """Convert schedule with TimeSlot objects to JSON-serializable format
+    
+    Keys are course ids as strings, matching what is read back from the JSON file.
+    """
+    return {
+        str(course_id): [{'day': slot.day, 'period': slot.period, 'room': slot.room} for slot in slots]
+        for course_id, slots in schedule.items()
+    }
 
-def display_timetable(timetable_data, courses, lecturers, selected_days=None, selected_rooms=None):
+def display_timetable(timetable_data, timetable, selected_days=None, selected_rooms=None):
     """Display the timetable in a nice format"""
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
     if selected_days is None:
@@ -137,35 +170,41 @@ def display_timetable(timetable_data, courses, lecturers, selected_days=None, se
     if selected_rooms is None:
         selected_rooms = [f'Room {i}' for i in range(8)]
     
-    # Create empty DataFrame
-    df = pd.DataFrame(
-        index=[get_time_for_period(i) for i in range(8)],
-        columns=pd.MultiIndex.from_product([selected_days, selected_rooms])
-    )
+    # Fill a plain array cell by cell and wrap it in a DataFrame once at the end;
+    # per-cell df.loc assignment goes through pandas label resolution every time
+    day_index = {day: i for i, day in enumerate(selected_days)}
+    room_index = {room: i for i, room in enumerate(selected_rooms)}
+    n_rooms = len(selected_rooms)
+    data = np.full((8, len(selected_days) * n_rooms), '', dtype=object)
     
-    # Fill timetable
     for course_id, slots in timetable_data.items():
-        course = next((c for c in courses if c.id == course_id), None)
+        course = timetable.course_map.get(course_id)
         if course is None:
             continue  # Skip if course not found
             
-        lecturer = next((l for l in lecturers if l.id == course.lecturer), None)
+        lecturer = timetable.lecturer_map.get(course.lecturer)
         if lecturer is None:
             continue  # Skip if lecturer not found
         
         for slot in slots:
-            day = days[slot.day]
-            room = f'Room {slot.room}'
-            if day in selected_days and room in selected_rooms:
+            day_idx = day_index.get(days[slot.day])
+            room_idx = room_index.get(f'Room {slot.room}')
+            if day_idx is not None and room_idx is not None:
                 cell_content = (
                     f"{course.name}\n"
                     f"Dr. {lecturer.name}"
                 )
-                df.loc[get_time_for_period(slot.period), (day, room)] = cell_content
+                data[slot.period, day_idx * n_rooms + room_idx] = cell_content
+    
+    df = pd.DataFrame(
+        data,
+        index=[get_time_for_period(i) for i in range(8)],
+        columns=pd.MultiIndex.from_product([selected_days, selected_rooms])
+    )
     
     # Apply custom styling
     st.dataframe(
-        df.fillna(''),
+        df,
         use_container_width=True,
         height=400
     )
@@ -178,6 +217,11 @@ def manage_data():
     
     courses, lecturers, _ = load_data()  
     
+    lecturers_by_id = {l.id: l for l in lecturers}
+    courses_by_lecturer = {}
+    for course in courses:
+        courses_by_lecturer.setdefault(course.lecturer, []).append(course)
+    
     with tab1:
         st.write("#### Add New Course")
         with st.form("add_course"):
@@ -186,7 +230,7 @@ def manage_data():
             lecturer_id = st.selectbox(
                 "Lecturer",
                 options=[l.id for l in lecturers],
-                format_func=lambda x: next(l.name for l in lecturers if l.id == x)
+                format_func=lambda x: lecturers_by_id[x].name
             )
             required_rooms = st.multiselect(
                 "Required Rooms",
@@ -196,7 +240,7 @@ def manage_data():
             )
             
             if st.form_submit_button("Add Course"):
-                new_id = max([c.id for c in courses], default=-1) + 1
+                new_id = max((c.id for c in courses), default=-1) + 1
                 new_course = Course(
                     id=new_id,
                     name=course_name,
@@ -205,14 +249,14 @@ def manage_data():
                     lecturer=lecturer_id
                 )
                 courses.append(new_course)
-                save_data(courses, lecturers, st.session_state.saved_timetable)
+                save_data(courses, lecturers)
                 st.success("Course added successfully!")
                 st.rerun()
         
         st.write("#### Existing Courses")
         for course in courses:
-            try:
-                lecturer = next(l for l in lecturers if l.id == course.lecturer)
+            lecturer = lecturers_by_id.get(course.lecturer)
+            if lecturer is not None:
                 with st.expander(f"{course.name}"):
                     st.write(f"Duration: {course.duration} hours")
                     st.write(f"Lecturer: {lecturer.name}")
@@ -225,20 +269,18 @@ def manage_data():
                                 st.session_state.confirm_delete_course = None
                             if st.session_state.confirm_delete_course == course.id:
                                 courses.remove(course)
-                                if st.session_state.saved_timetable and str(course.id) in st.session_state.saved_timetable:
-                                    del st.session_state.saved_timetable[str(course.id)]
+                                st.session_state.saved_timetable.pop(str(course.id), None)
                                 save_data(courses, lecturers, st.session_state.saved_timetable)
                                 st.success("Course deleted successfully!")
                                 st.rerun()
                             else:
                                 st.session_state.confirm_delete_course = course.id
                                 st.warning(f"Click again to confirm deleting {course.name}")
-            except StopIteration:
+            else:
                 st.error(f"Course {course.name} (ID: {course.id}) has an invalid lecturer ID: {course.lecturer}")
                 if st.button(f"Delete Invalid Course", key=f"del_invalid_course_{course.id}"):
                     courses.remove(course)
-                    if st.session_state.saved_timetable and str(course.id) in st.session_state.saved_timetable:
-                        del st.session_state.saved_timetable[str(course.id)]
+                    st.session_state.saved_timetable.pop(str(course.id), None)
                     save_data(courses, lecturers, st.session_state.saved_timetable)
                     st.success("Invalid course deleted successfully!")
                     st.rerun()
@@ -254,7 +296,7 @@ def manage_data():
             )
             
             if st.form_submit_button("Add Lecturer"):
-                new_id = max([l.id for l in lecturers], default=-1) + 1
+                new_id = max((l.id for l in lecturers), default=-1) + 1
                 # Convert days to slots
                 available_slots = []
                 for day_name in availability:
@@ -267,14 +309,14 @@ def manage_data():
                     available_slots=available_slots
                 )
                 lecturers.append(new_lecturer)
-                save_data(courses, lecturers, st.session_state.saved_timetable)
+                save_data(courses, lecturers)
                 st.success("Lecturer added successfully!")
                 st.rerun()
         
         st.write("#### Existing Lecturers")
         for lecturer in lecturers:
             with st.expander(f"{lecturer.name}"):
-                lecturer_courses = [c for c in courses if c.lecturer == lecturer.id]
+                lecturer_courses = courses_by_lecturer.get(lecturer.id, [])
                 if lecturer_courses:
                     st.write("Teaching:")
                     for course in lecturer_courses:
@@ -292,7 +334,7 @@ def manage_data():
                                 st.session_state.confirm_delete_lecturer = None
                             if st.session_state.confirm_delete_lecturer == lecturer.id:
                                 lecturers.remove(lecturer)
-                                save_data(courses, lecturers, st.session_state.saved_timetable)
+                                save_data(courses, lecturers)
                                 st.success("Lecturer deleted successfully!")
                                 st.rerun()
                             else:
@@ -315,7 +357,7 @@ def main():
     
     # Create timetable instance
     timetable = Timetable(courses=courses, lecturers=lecturers, rooms=rooms)
-    solution_size = sum(course.duration * 3 for course in courses)  # 3 values per slot: day, period, room
+    solution_size = timetable.solution_size  # 3 values per slot: day, period, room
     
     with tab1:
         st.write("### Current Timetable")
@@ -344,12 +386,11 @@ def main():
                 schedule[course_id] = [TimeSlot(**slot) for slot in slots]
                 
                 # Verify that the course exists
-                course = next((c for c in courses if c.id == course_id), None)
-                if course is None:
+                if course_id not in timetable.course_map:
                     st.error(f"Course with ID {course_id} not found in the database!")
                     continue
             
-            display_timetable(schedule, courses, lecturers, selected_days, selected_rooms)
+            display_timetable(schedule, timetable, selected_days, selected_rooms)
             
             # Display statistics
             st.write("### Schedule Statistics")
@@ -461,7 +502,9 @@ def main():
                             w_start=w_start,
                             w_end=w_end,
                             c1=c1,
-                            c2=c2
+                            c2=c2,
+                            batched=True,
+                            discrete=True  # Timetable fitness rounds positions to slots
                         )
                         best_solution = optimizer.optimize(create_fitness_function(timetable), solution_size)
                     else:
@@ -474,12 +517,13 @@ def main():
                         )
                         optimizer = GeneticAlgorithm(
                             config=config,
-                            fitness_func=create_fitness_function(timetable)
+                            fitness_func=create_fitness_function(timetable),
+                            batched=True
                         )
                         best_solution = optimizer.optimize(solution_size)
                     
                     if best_solution is not None:
-                        timetable.schedule = decode_solution(best_solution, courses)
+                        timetable.schedule = decode_solution(best_solution, timetable)
                         
                         # Save the best timetable
                         st.session_state.saved_timetable = convert_schedule_to_json(timetable.schedule)
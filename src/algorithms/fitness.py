@@ -0,0 +1,87 @@
+"""
+Fitness evaluation shared by the optimization algorithms.
+"""
+import multiprocessing
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+class FitnessEvaluator:
+    def __init__(self,
+                 fitness_func: Callable,
+                 batched: bool = False,  # fitness_func maps (n, solution_size) to n values
+                 n_processes: Optional[int] = None,  # Worker processes for fitness (None = serial)
+                 cache_size: int = 0):  # Fitness values memoized per solution key, LRU (0 = no cache)
+        self.fitness_func = fitness_func
+        self.batched = batched
+        self.n_processes = n_processes
+        self.cache_size = cache_size
+        self.executor = None
+        self.cache = OrderedDict()  # solution key bytes -> fitness
+        self.n_evaluations = 0  # Solutions actually passed to fitness_func
+    
+    def reset(self):
+        """Forget cached fitness values and the evaluation count."""
+        self.cache.clear()
+        self.n_evaluations = 0
+    
+    @contextmanager
+    def worker_pool(self):
+        """Run per-solution fitness in n_processes worker processes inside the block.
+        
+        Evaluations are independent, so the workers are started once for a whole run.
+        Spawn rather than fork: forking after Numba has started its threads deadlocks.
+        """
+        if not self.n_processes or self.batched:
+            yield
+            return
+        self.executor = ProcessPoolExecutor(max_workers=self.n_processes,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        try:
+            yield
+        finally:
+            self.executor.shutdown()
+            self.executor = None
+    
+    def evaluate(self, solutions: np.ndarray, keys: Optional[np.ndarray] = None) -> np.ndarray:
+        """Calculate the fitness of every solution, reusing cached values.
+        
+        Row i is cached under keys[i] (default: the solution itself), so callers whose
+        fitness only depends on part of a solution can pass a smaller key.
+        """
+        if not self.cache_size:
+            return self.compute(solutions)
+        if keys is None:
+            keys = solutions
+        
+        fitness = np.empty(len(solutions), dtype=np.float64)
+        missing = {}  # key bytes -> rows needing evaluation
+        for i, key in enumerate(keys):
+            key = key.tobytes()
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                fitness[i] = self.cache[key]
+            else:
+                missing.setdefault(key, []).append(i)
+        
+        if missing:
+            rows = [idx[0] for idx in missing.values()]
+            for (key, idx), value in zip(missing.items(), self.compute(solutions[rows])):
+                fitness[idx] = value
+                self.cache[key] = value
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return fitness
+    
+    def compute(self, solutions: np.ndarray) -> np.ndarray:
+        """Call the fitness function on every solution."""
+        self.n_evaluations += len(solutions)
+        if self.batched:
+            return np.asarray(self.fitness_func(solutions), dtype=np.float64)
+        if self.executor is not None:
+            chunksize = max(1, len(solutions) // (4 * self.n_processes))
+            return np.fromiter(self.executor.map(self.fitness_func, solutions, chunksize=chunksize),
+                               dtype=np.float64, count=len(solutions))
+        return np.array([self.fitness_func(s) for s in solutions], dtype=np.float64)
@@ -2,9 +2,10 @@
 Genetic Algorithm implementation for university timetabling.
 """
 import numpy as np
-from typing import List, Tuple, Callable, Any
+from typing import Tuple, Callable, Any, Optional
 from dataclasses import dataclass
-import random
+
+from src.algorithms.fitness import FitnessEvaluator
 
 @dataclass
 class GeneticAlgorithmConfig:
@@ -13,93 +14,107 @@ class GeneticAlgorithmConfig:
     mutation_rate: float = 0.1
     tournament_size: int = 3
     elite_size: int = 1
-
-class Individual:
-    def __init__(self, chromosome: np.ndarray):
-        self.chromosome = chromosome
-        self.fitness = float('inf')
+    seed: Optional[int] = None  # Random seed for reproducible runs
+    n_processes: Optional[int] = None  # Worker processes for fitness evaluation (None = serial)
+    cache_size: int = 0  # Fitness values memoized per chromosome, LRU (0 = no cache)
 
 class GeneticAlgorithm:
-    def __init__(self, config: GeneticAlgorithmConfig, fitness_func: Callable):
+    def __init__(self, config: GeneticAlgorithmConfig, fitness_func: Callable, batched: bool = False):
         self.config = config
         self.fitness_func = fitness_func
-        self.population: List[Individual] = []
-        self.best_individual = None
+        # fitness_func receives int8 chromosomes; when batched it maps a
+        # (n, solution_size) array to n fitness values
+        self.batched = batched
+        # Population stored as arrays: one int8 chromosome per row, one fitness per row
+        self.chromosomes: np.ndarray = None
+        self.fitness: np.ndarray = None
+        self.best_chromosome = None
         self.best_fitness = float('inf')
         self.solution_size = None
+        self.rng = np.random.default_rng(config.seed)
+        self.evaluator = FitnessEvaluator(fitness_func, batched, config.n_processes, config.cache_size)
         
     def initialize_population(self, solution_size: int):
         """Initialize random population."""
         self.solution_size = solution_size
-        self.population = []
-        for _ in range(self.config.population_size):
-            # Initialize with values suitable for timetabling
-            # Every 3 values represent: day (0-4), period (0-7), room (0-7)
-            chromosome = np.zeros(solution_size)
-            for i in range(0, solution_size, 3):
-                chromosome[i] = np.random.randint(0, 5)      # day
-                chromosome[i+1] = np.random.randint(0, 8)    # period
-                chromosome[i+2] = np.random.randint(0, 8)    # room
-                
-            individual = Individual(chromosome)
-            individual.fitness = self.fitness_func(individual.chromosome)
-            self.population.append(individual)
-            
-            # Update best if needed
-            if individual.fitness < self.best_fitness:
-                self.best_fitness = individual.fitness
-                self.best_individual = Individual(individual.chromosome.copy())
-                self.best_individual.fitness = individual.fitness
+        n_slots = solution_size // 3
+        shape = (self.config.population_size, n_slots)
+        
+        # Every 3 values represent: day (0-4), period (0-7), room (0-7)
+        chromosomes = np.empty((self.config.population_size, solution_size), dtype=np.int8)
+        chromosomes[:, 0::3] = self.rng.integers(0, 5, size=shape, dtype=np.int8)  # day
+        chromosomes[:, 1::3] = self.rng.integers(0, 8, size=shape, dtype=np.int8)  # period
+        chromosomes[:, 2::3] = self.rng.integers(0, 8, size=shape, dtype=np.int8)  # room
+        self.chromosomes = chromosomes
+        self.evaluator.reset()
+        self.fitness = self.evaluator.evaluate(chromosomes)
+        self.best_chromosome = None
+        self.best_fitness = float('inf')
+        self.update_best(self.chromosomes, self.fitness)
+    
+    def update_best(self, chromosomes: np.ndarray, fitness: np.ndarray):
+        """Update the best solution found so far."""
+        best_idx = int(np.argmin(fitness))
+        if fitness[best_idx] < self.best_fitness:
+            self.best_fitness = float(fitness[best_idx])
+            self.best_chromosome = chromosomes[best_idx].copy()
                 
-    def tournament_selection(self) -> Individual:
-        """Select parent using tournament selection."""
-        tournament = random.sample(self.population, self.config.tournament_size)
-        return min(tournament, key=lambda x: x.fitness)
+    def tournament_selection(self, n: int) -> np.ndarray:
+        """Select the indices of n parents using tournament selection."""
+        candidates = self.rng.integers(0, len(self.fitness), size=(n, self.config.tournament_size))
+        return candidates[np.arange(n), np.argmin(self.fitness[candidates], axis=1)]
     
-    def crossover(self, parent1: Individual, parent2: Individual) -> Individual:
-        """Perform crossover between two parents."""
-        # Use uniform crossover
-        mask = np.random.random(self.solution_size) < 0.5
-        child_chromosome = np.where(mask, parent1.chromosome, parent2.chromosome)
-        return Individual(child_chromosome)
+    def crossover(self, parents1: np.ndarray, parents2: np.ndarray) -> np.ndarray:
+        """Perform uniform crossover between two batches of parents."""
+        mask = self.rng.random(parents1.shape) < 0.5
+        return np.where(mask, parents1, parents2)
     
-    def mutate(self, individual: Individual):
-        """Mutate an individual."""
-        for i in range(0, len(individual.chromosome), 3):
-            if np.random.random() < self.config.mutation_rate:
-                individual.chromosome[i] = np.random.randint(0, 5)      # day
-            if np.random.random() < self.config.mutation_rate:
-                individual.chromosome[i+1] = np.random.randint(0, 8)    # period
-            if np.random.random() < self.config.mutation_rate:
-                individual.chromosome[i+2] = np.random.randint(0, 8)    # room
+    def mutate(self, children: np.ndarray):
+        """Mutate a batch of chromosomes in place."""
+        # Draw every mutation decision for the batch at once, then split by gene field
+        mutation_mask = self.rng.random(children.shape) < self.config.mutation_rate
+        for offset, high in ((0, 5), (1, 8), (2, 8)):  # day, period, room
+            genes = children[:, offset::3]
+            mask = mutation_mask[:, offset::3]
+            genes[mask] = self.rng.integers(0, high, size=int(mask.sum()), dtype=children.dtype)
     
     def optimize(self, solution_size: int) -> np.ndarray:
         """Run genetic algorithm optimization."""
+        with self.evaluator.worker_pool():
+            return self.evolve(solution_size)
+    
+    def evolve(self, solution_size: int) -> np.ndarray:
+        """Evolve the population for the configured number of generations."""
         # Initialize population
         self.initialize_population(solution_size)
+        # argpartition needs elite_size <= population_size
+        elite_size = min(self.config.elite_size, self.config.population_size)
+        n_children = self.config.population_size - elite_size
         
         for generation in range(self.config.n_generations):
-            new_population = []
+            new_chromosomes = np.empty_like(self.chromosomes)
+            new_fitness = np.empty_like(self.fitness)
             
-            # Elitism: keep best individuals
-            sorted_pop = sorted(self.population, key=lambda x: x.fitness)
-            new_population.extend([Individual(x.chromosome.copy()) for x in sorted_pop[:self.config.elite_size]])
+            # Elitism: keep best individuals (partial sort, no need to order the rest)
+            if elite_size == 1 and self.best_chromosome is not None:
+                # Elites survive every generation, so the best so far is the population's best
+                new_chromosomes[0] = self.best_chromosome
+                new_fitness[0] = self.best_fitness
+            elif elite_size > 0:  # Also when nothing has beaten inf yet (no best chromosome)
+                elite_idx = np.argpartition(self.fitness, elite_size - 1)[:elite_size]
+                new_chromosomes[:elite_size] = self.chromosomes[elite_idx]
+                new_fitness[:elite_size] = self.fitness[elite_idx]
             
             # Generate rest of new population
-            while len(new_population) < self.config.population_size:
-                parent1 = self.tournament_selection()
-                parent2 = self.tournament_selection()
-                child = self.crossover(parent1, parent2)
-                self.mutate(child)
-                child.fitness = self.fitness_func(child.chromosome)
-                new_population.append(child)
-                
-                # Update best if needed
-                if child.fitness < self.best_fitness:
-                    self.best_fitness = child.fitness
-                    self.best_individual = Individual(child.chromosome.copy())
-                    self.best_individual.fitness = child.fitness
+            parents1 = self.tournament_selection(n_children)
+            parents2 = self.tournament_selection(n_children)
+            children = self.crossover(self.chromosomes[parents1], self.chromosomes[parents2])
+            self.mutate(children)
+            new_chromosomes[elite_size:] = children
+            new_fitness[elite_size:] = self.evaluator.evaluate(children)
             
-            self.population = new_population
+            self.chromosomes = new_chromosomes
+            self.fitness = new_fitness
+            self.update_best(self.chromosomes, self.fitness)
         
-        return self.best_individual.chromosome
\ No newline at end of file
+        return self.best_chromosome
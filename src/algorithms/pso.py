@@ -2,15 +2,10 @@
 Particle Swarm Optimization (PSO) implementation.
 """
 import numpy as np
-from dataclasses import dataclass
-from typing import Tuple, Callable
+from typing import Tuple, Callable, Optional
 
-@dataclass
-class Particle:
-    position: np.ndarray
-    velocity: np.ndarray
-    best_position: np.ndarray
-    best_fitness: float
+from src.algorithms.fitness import FitnessEvaluator
+from src.numba_compat import KERNEL_LOCK, NUMBA_AVAILABLE, njit, prange
 
 class PSO:
     def __init__(self,
@@ -20,7 +15,12 @@ class PSO:
                  w_end: float = 0.4,    # Final inertia weight
                  c1: float = 2.0,       # Cognitive weight
                  c2: float = 2.0,       # Social weight
-                 v_max: float = 4.0):   # Maximum velocity
+                 v_max: float = 4.0,    # Maximum velocity
+                 batched: bool = False,  # fitness_func maps (n, solution_size) to n values
+                 discrete: bool = False,  # fitness_func only depends on the rounded position
+                 cache_size: int = 0,  # Fitness values memoized per rounded position, LRU (0 = no cache)
+                 n_processes: Optional[int] = None,  # Worker processes for fitness (None = serial)
+                 seed: Optional[int] = None):  # Random seed for reproducible runs
         self.n_particles = n_particles
         self.n_iterations = n_iterations
         self.w_start = w_start
@@ -28,73 +28,152 @@ class PSO:
         self.c1 = c1
         self.c2 = c2
         self.v_max = v_max
+        self.batched = batched
+        self.discrete = discrete
+        if cache_size and not discrete:
+            raise ValueError("cache_size requires discrete=True: fitness is cached by rounded position")
+        self.cache_size = cache_size
+        self.n_processes = n_processes
+        self.rng = np.random.default_rng(seed)
         self.w = w_start
-        self.particles = []
+        # Swarm stored as arrays: one particle per row
+        self.positions: np.ndarray = None
+        self.velocities: np.ndarray = None
+        self.best_positions: np.ndarray = None
+        self.best_fitness: np.ndarray = None
         self.global_best_position = None
         self.global_best_fitness = float('inf')
+        # Rounded position and fitness of each particle at its last evaluation (discrete only)
+        self.evaluated_positions: np.ndarray = None
+        self.evaluated_fitness: np.ndarray = None
+        self.evaluator: FitnessEvaluator = None  # Set up by optimize
+        self._scratch: np.ndarray = None  # Work buffer for the NumPy swarm update
         self.fitness_func = None
         self.solution_size = None
         
     def initialize_particles(self):
         """Initialize particles with random positions and velocities."""
-        self.particles = []
-        for _ in range(self.n_particles):
-            # Initialize particle position (solution)
-            position = np.random.uniform(0, 5, size=self.solution_size)  # Values will be rounded later
-            velocity = np.random.uniform(-self.v_max, self.v_max, size=self.solution_size)
-            
-            particle = Particle(
-                position=position.copy(),
-                velocity=velocity,
-                best_position=position.copy(),
-                best_fitness=float('inf')
-            )
-            
-            # Calculate initial fitness
-            fitness = self.fitness_func(position)
-            particle.best_fitness = fitness
-            
-            # Update global best if needed
-            if fitness < self.global_best_fitness:
-                self.global_best_fitness = fitness
-                self.global_best_position = position.copy()
-                
-            self.particles.append(particle)
+        # float32 is ample for positions that are rounded to small integers for fitness,
+        # and halves the memory traffic of the swarm update
+        shape = (self.n_particles, self.solution_size)
+        self.positions = self.rng.uniform(0, 5, size=shape).astype(np.float32)  # Values will be rounded later
+        self.velocities = self.rng.uniform(-self.v_max, self.v_max, size=shape).astype(np.float32)
+        self.best_positions = self.positions.copy()
+        
+        # Calculate initial fitness
+        self.evaluated_positions = None
+        self.evaluator.reset()
+        self.best_fitness = self.evaluate(self.positions).copy()
+        self.update_global_best()
+    
+    def evaluate(self, positions: np.ndarray) -> np.ndarray:
+        """Calculate the fitness of every particle position.
+        
+        With discrete fitness, particles whose rounded position is unchanged since their
+        last evaluation keep that fitness instead of being evaluated again.
+        """
+        if not self.discrete:
+            return self.evaluator.evaluate(positions)
+        
+        rounded = np.rint(positions)
+        if self.evaluated_positions is None:
+            self.evaluated_positions = rounded
+            self.evaluated_fitness = self.evaluator.evaluate(positions, self.fitness_keys(rounded))
+            return self.evaluated_fitness
+        
+        moved = np.any(rounded != self.evaluated_positions, axis=1)
+        if np.any(moved):
+            self.evaluated_positions[moved] = rounded[moved]
+            self.evaluated_fitness[moved] = self.evaluator.evaluate(positions[moved],
+                                                                    self.fitness_keys(rounded[moved]))
+        return self.evaluated_fitness
+    
+    def fitness_keys(self, rounded: np.ndarray) -> Optional[np.ndarray]:
+        """Fitness cache keys for rounded positions (None when there is no cache)."""
+        # Integer keys, since rint may give -0.0, whose bytes differ from 0.0
+        return rounded.astype(np.int64) if self.cache_size else None
+    
+    def update_swarm(self, r1: np.ndarray, r2: np.ndarray):
+        """Update every particle's velocity and position in place."""
+        if NUMBA_AVAILABLE:
+            with KERNEL_LOCK:
+                _pso_step(self.positions, self.velocities, self.best_positions,
+                          self.global_best_position, r1, r2, self.w, self.c1, self.c2, self.v_max)
+            return
+        
+        # Accumulate into the velocity buffer through one scratch array reused across iterations
+        if self._scratch is None or self._scratch.shape != self.positions.shape:
+            self._scratch = np.empty_like(self.positions)
+        scratch = self._scratch
+        self.velocities *= self.w
+        np.subtract(self.best_positions, self.positions, out=scratch)
+        scratch *= (self.c1 * r1)[:, None]
+        self.velocities += scratch
+        np.subtract(self.global_best_position, self.positions, out=scratch)
+        scratch *= (self.c2 * r2)[:, None]
+        self.velocities += scratch
+        
+        # Clamp velocity
+        np.clip(self.velocities, -self.v_max, self.v_max, out=self.velocities)
+        
+        # Update positions
+        self.positions += self.velocities
+    
+    def update_global_best(self):
+        """Update the global best from the particles' personal bests."""
+        best_idx = int(np.argmin(self.best_fitness))
+        if self.global_best_position is None:
+            # Record a position even if nothing beats inf yet: the swarm update needs one
+            self.global_best_fitness = float(self.best_fitness[best_idx])
+            self.global_best_position = self.best_positions[best_idx].copy()
+        elif self.best_fitness[best_idx] < self.global_best_fitness:
+            self.global_best_fitness = float(self.best_fitness[best_idx])
+            np.copyto(self.global_best_position, self.best_positions[best_idx])
             
     def optimize(self, fitness_func: Callable, solution_size: int) -> np.ndarray:
         """Run PSO optimization."""
         self.fitness_func = fitness_func
         self.solution_size = solution_size
+        self.evaluator = FitnessEvaluator(fitness_func, self.batched, self.n_processes, self.cache_size)
+        
+        with self.evaluator.worker_pool():
+            return self.fly()
+    
+    def fly(self) -> np.ndarray:
+        """Move the swarm for the configured number of iterations."""
+        self.global_best_position = None
+        self.global_best_fitness = float('inf')
         self.initialize_particles()
         
         for iteration in range(self.n_iterations):
             # Update inertia weight
             self.w = self.w_start - (self.w_start - self.w_end) * iteration / self.n_iterations
             
-            for particle in self.particles:
-                # Update velocity
-                r1, r2 = np.random.random(2)
-                cognitive = self.c1 * r1 * (particle.best_position - particle.position)
-                social = self.c2 * r2 * (self.global_best_position - particle.position)
-                particle.velocity = (self.w * particle.velocity + cognitive + social)
-                
-                # Clamp velocity
-                particle.velocity = np.clip(particle.velocity, -self.v_max, self.v_max)
-                
-                # Update position
-                particle.position += particle.velocity
-                
-                # Calculate fitness
-                fitness = self.fitness_func(particle.position)
-                
-                # Update personal best
-                if fitness < particle.best_fitness:
-                    particle.best_fitness = fitness
-                    particle.best_position = particle.position.copy()
-                    
-                    # Update global best
-                    if fitness < self.global_best_fitness:
-                        self.global_best_fitness = fitness
-                        self.global_best_position = particle.position.copy()
+            # Update velocities and positions (one r1, r2 pair per particle, drawn in one call)
+            r1, r2 = self.rng.random((2, self.n_particles), dtype=np.float32)
+            self.update_swarm(r1, r2)
+            
+            # Calculate fitness
+            fitness = self.evaluate(self.positions)
+            
+            # Update personal and global bests in place
+            improved = fitness < self.best_fitness
+            np.copyto(self.best_fitness, fitness, where=improved)
+            np.copyto(self.best_positions, self.positions, where=improved[:, None])
+            self.update_global_best()
         
-        return self.global_best_position
\ No newline at end of file
+        # Like the genetic algorithm, report no solution if no position scored below inf
+        return self.global_best_position if self.global_best_fitness < float('inf') else None
+
+@njit(cache=True, parallel=True, fastmath=True)
+def _pso_step(positions, velocities, best_positions, global_best, r1, r2, w, c1, c2, v_max):
+    """Fused velocity update, clamp and position update, one pass per particle."""
+    n_particles, solution_size = positions.shape
+    for i in prange(n_particles):
+        for k in range(solution_size):
+            v = (w * velocities[i, k]
+                 + c1 * r1[i] * (best_positions[i, k] - positions[i, k])
+                 + c2 * r2[i] * (global_best[k] - positions[i, k]))
+            v = min(max(v, -v_max), v_max)  # Branchless clamp, vectorizes to min/max
+            velocities[i, k] = v
+            positions[i, k] += v
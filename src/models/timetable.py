@@ -6,6 +6,8 @@ from dataclasses import dataclass
 from typing import List, Dict, Tuple, Optional
 import numpy as np
 
+from src.numba_compat import KERNEL_LOCK, NUMBA_AVAILABLE, njit, prange
+
 @dataclass
 class Course:
     id: int
@@ -38,54 +40,231 @@ class Timetable:
         self.rooms = rooms
         self.days = days
         self.periods_per_day = periods_per_day
-        self.schedule = {}  # course_id -> list of TimeSlots
+        self.course_map = {c.id: c for c in courses}  # course_id -> Course
+        self.lecturer_map = {l.id: l for l in lecturers}  # lecturer_id -> Lecturer
+        
+        # Encoded solutions hold one (day, period, room) triplet per course slot;
+        # course i owns slots course_offsets[i]:course_offsets[i + 1]
+        self.course_offsets = np.cumsum([0] + [c.duration for c in courses]).astype(np.int64)
+        self.solution_size = int(self.course_offsets[-1]) * 3
+        
+        # Flat lookup tables used by get_fitness and batch_fitness
+        self._course_index = {c.id: i for i, c in enumerate(courses)}
+        lecturer_index = {l.id: i for i, l in enumerate(lecturers)}
+        self._course_lecturer = np.array([lecturer_index.get(c.lecturer, -1) for c in courses],
+                                         dtype=np.int64)
+        # Encoded room genes are indices into rooms; required rooms are room ids
+        self._room_index = {room: i for i, room in enumerate(rooms)}
+        self._room_allowed = np.zeros((len(courses), len(rooms)), dtype=np.bool_)
+        for i, course in enumerate(courses):
+            for room in course.required_rooms:
+                if room in self._room_index:  # Rooms outside the timetable can never be used
+                    self._room_allowed[i, self._room_index[room]] = True
+        self._lecturer_avail = build_avail_masks(lecturers, days, periods_per_day)
+        
+        # The schedule is stored as one array per slot field (see set_schedule)
+        self.set_schedule([], [], [], [])
+    
+    @property
+    def schedule(self) -> Dict[int, List[TimeSlot]]:
+        """The schedule as course_id -> list of TimeSlots.
+        
+        Built from the slot arrays on each access, so assign a new dict (or call
+        set_schedule) to change it; editing the returned dict has no effect.
+        """
+        schedule = {}
+        for course, day, period, room in zip(self.slot_course.tolist(), self.slot_day.tolist(),
+                                             self.slot_period.tolist(), self.slot_room.tolist()):
+            schedule.setdefault(self.courses[course].id, []).append(TimeSlot(day, period, room))
+        return schedule
+    
+    @schedule.setter
+    def schedule(self, schedule: Dict[int, List[TimeSlot]]):
+        slots = [(course_id, slot.day, slot.period, slot.room)
+                 for course_id, course_slots in schedule.items() for slot in course_slots]
+        if slots:
+            self.set_schedule(*zip(*slots))
+        else:
+            self.set_schedule([], [], [], [])
+    
+    def set_schedule(self, course_ids, days, periods, rooms):
+        """Set the schedule from parallel sequences with one entry per slot.
+        
+        course_ids and rooms hold course and room ids; days and periods are grid indices.
+        """
+        self.slot_course = np.array([self._course_index[course_id] for course_id in course_ids],
+                                    dtype=np.int64)
+        self.slot_day = np.asarray(days, dtype=np.int64)
+        self.slot_period = np.asarray(periods, dtype=np.int64)
+        self.slot_room = np.asarray(rooms, dtype=np.int64)
+        # Room index of each slot for fitness, -1 for ids not in rooms
+        self._slot_room_index = np.array([self._room_index.get(room, -1) for room in rooms],
+                                         dtype=np.int64)
+        
+    def batch_fitness(self, solutions: np.ndarray) -> np.ndarray:
+        """Calculate the fitness of a batch of encoded solutions (lower is better).
+        
+        Each row holds a (day, period, room) triplet per course slot, in course order.
+        """
+        solutions = np.asarray(solutions)
+        if not np.issubdtype(solutions.dtype, np.integer):
+            solutions = np.rint(solutions).astype(np.int64)
+        if np.any(self._course_lecturer < 0):
+            raise ValueError("Timetable contains a course with an unknown lecturer")
+        args = (np.ascontiguousarray(solutions), self.course_offsets, self._course_lecturer,
+                self._room_allowed, self._lecturer_avail, self.days, self.periods_per_day)
+        if not NUMBA_AVAILABLE:
+            return _batch_fitness_numpy(*args)
+        with KERNEL_LOCK:
+            return _batch_fitness(*args)
         
     def get_fitness(self) -> float:
-        """Calculate the fitness of the current timetable (lower is better)."""
+        """Calculate the fitness of the current timetable (lower is better).
+        
+        All slots must lie on the timetable grid: day < days, period < periods_per_day
+        and room one of the timetable's room ids.
+        """
+        slot_course, day, period = self.slot_course, self.slot_day, self.slot_period
+        room = self._slot_room_index
+        if len(slot_course) == 0:
+            return 0.0
+        
+        if np.any(self._course_lecturer[slot_course] < 0):
+            raise ValueError("Schedule contains a course with an unknown lecturer")
+        if not (np.all((0 <= day) & (day < self.days)) and np.all((0 <= period) & (period < self.periods_per_day))
+                and np.all(room >= 0)):
+            raise ValueError("Schedule contains a slot outside the timetable grid")
+        
+        # Room validity, lecturer availability, room and lecturer conflicts
+        penalties = _slot_penalties(slot_course, day[None], period[None], room[None],
+                                    self._course_lecturer, self._room_allowed,
+                                    self._lecturer_avail, self.days, self.periods_per_day)
+        
+        # Course continuity (slots should be on same day and consecutive)
+        penalties += _continuity_penalties(slot_course, day[None], period[None],
+                                           self.days, self.periods_per_day)
+        
+        return float(penalties[0])
+
+def build_avail_masks(lecturers: List[Lecturer], days: int, periods_per_day: int) -> np.ndarray:
+    """Encode each lecturer's availability as a uint64 bitmask.
+    
+    Bit day * periods_per_day + period is set when the lecturer is available then.
+    """
+    if days * periods_per_day > 64:
+        raise ValueError(f"Availability bitmasks hold at most 64 slots, got {days} x {periods_per_day}")
+    masks = np.zeros(len(lecturers), dtype=np.uint64)
+    for i, lecturer in enumerate(lecturers):
+        mask = 0
+        for day, period in lecturer.available_slots:
+            if 0 <= day < days and 0 <= period < periods_per_day:
+                mask |= 1 << (day * periods_per_day + period)
+        masks[i] = mask
+    return masks
+
+@njit(cache=True, parallel=True)
+def _batch_fitness(solutions, course_offsets, course_lecturer, room_allowed, lecturer_avail,
+                   days, periods):
+    """Same penalties as Timetable.get_fitness, computed for every row of solutions."""
+    n_lecturers = lecturer_avail.shape[0]
+    n_rooms = room_allowed.shape[1]
+    n_slots = course_offsets[-1]
+    fitness = np.empty(solutions.shape[0])
+    
+    for p in prange(solutions.shape[0]):
+        room_used = np.zeros(days * periods * n_rooms, dtype=np.bool_)
+        lecturer_used = np.zeros(days * periods * n_lecturers, dtype=np.bool_)
+        times = np.empty(n_slots, dtype=np.int64)
         penalties = 0.0
         
-        # Check room conflicts
-        room_schedule = {}  # (day, period, room) -> course_id
-        for course_id, slots in self.schedule.items():
-            course = next(c for c in self.courses if c.id == course_id)
-            
-            # Check if rooms are valid for this course
-            for slot in slots:
-                if slot.room not in course.required_rooms:
-                    penalties += 100  # Major penalty for invalid room
+        for c in range(course_lecturer.shape[0]):
+            lecturer = course_lecturer[c]
+            for s in range(course_offsets[c], course_offsets[c + 1]):
+                day = int(solutions[p, 3 * s]) % days
+                period = int(solutions[p, 3 * s + 1]) % periods
+                room = int(solutions[p, 3 * s + 2]) % n_rooms
+                time = day * periods + period
+                times[s] = time
                 
-                key = (slot.day, slot.period, slot.room)
-                if key in room_schedule:
-                    penalties += 1000  # Major penalty for room conflict
-                room_schedule[key] = course_id
-        
-        # Check lecturer conflicts
-        lecturer_schedule = {}  # (day, period, lecturer_id) -> course_id
-        for course_id, slots in self.schedule.items():
-            course = next(c for c in self.courses if c.id == course_id)
-            lecturer = next(l for l in self.lecturers if l.id == course.lecturer)
-            
-            # Check lecturer availability
-            for slot in slots:
-                if not any(avail[0] == slot.day and avail[1] == slot.period 
-                          for avail in lecturer.available_slots):
-                    penalties += 100  # Major penalty for unavailable slot
+                if not room_allowed[c, room]:
+                    penalties += 100  # Invalid room
+                if room_used[time * n_rooms + room]:
+                    penalties += 1000  # Room conflict
+                room_used[time * n_rooms + room] = True
                 
-                key = (slot.day, slot.period, course.lecturer)
-                if key in lecturer_schedule:
-                    penalties += 1000  # Major penalty for lecturer conflict
-                lecturer_schedule[key] = course_id
-        
-        # Check course continuity (slots should be on same day and consecutive)
-        for course_id, slots in self.schedule.items():
-            if len(slots) > 1:
-                slots.sort(key=lambda x: (x.day, x.period))
-                prev_slot = slots[0]
-                for slot in slots[1:]:
-                    if slot.day != prev_slot.day:
-                        penalties += 50  # Penalty for splitting course across days
-                    elif slot.period != prev_slot.period + 1:
-                        penalties += 30  # Penalty for non-consecutive periods
-                    prev_slot = slot
+                if not (lecturer_avail[lecturer] >> np.uint64(time)) & np.uint64(1):
+                    penalties += 100  # Lecturer unavailable
+                if lecturer_used[time * n_lecturers + lecturer]:
+                    penalties += 1000  # Lecturer conflict
+                lecturer_used[time * n_lecturers + lecturer] = True
+            
+            # Course continuity (slots should be on same day and consecutive)
+            course_times = np.sort(times[course_offsets[c]:course_offsets[c + 1]])
+            for i in range(1, course_times.shape[0]):
+                if course_times[i] // periods != course_times[i - 1] // periods:
+                    penalties += 50
+                elif course_times[i] != course_times[i - 1] + 1:
+                    penalties += 30
         
-        return penalties
\ No newline at end of file
+        fitness[p] = penalties
+    
+    return fitness
+
+def _batch_fitness_numpy(solutions, course_offsets, course_lecturer, room_allowed, lecturer_avail,
+                         days, periods):
+    """NumPy version of _batch_fitness, evaluating the whole batch with array operations."""
+    slot_course = np.repeat(np.arange(len(course_lecturer)), np.diff(course_offsets))
+    
+    genes = solutions.reshape(len(solutions), -1, 3).astype(np.int64)
+    day = genes[:, :, 0] % days
+    period = genes[:, :, 1] % periods
+    room = genes[:, :, 2] % room_allowed.shape[1]
+    penalties = _slot_penalties(slot_course, day, period, room, course_lecturer, room_allowed,
+                                lecturer_avail, days, periods)
+    penalties += _continuity_penalties(slot_course, day, period, days, periods)
+    return penalties
+
+def _slot_penalties(slot_course, day, period, room, course_lecturer, room_allowed, lecturer_avail,
+                    days, periods):
+    """Room validity, availability and conflict penalties for each row of slot arrays.
+    
+    day, period and room are (n_schedules, n_slots) arrays on the timetable grid and
+    slot_course gives the course index of each slot column.
+    """
+    n_rooms = room_allowed.shape[1]
+    n_lecturers = len(lecturer_avail)
+    slot_lecturer = course_lecturer[slot_course]
+    time = day * periods + period
+    
+    penalties = 100.0 * np.count_nonzero(~room_allowed[slot_course, room], axis=1)
+    available = (lecturer_avail[slot_lecturer] >> time.astype(np.uint64)) & np.uint64(1)
+    penalties += 100.0 * np.count_nonzero(available == 0, axis=1)
+    penalties += 1000.0 * _count_duplicates(time * n_rooms + room)
+    penalties += 1000.0 * _count_duplicates(time * n_lecturers + slot_lecturer)
+    return penalties
+
+def _continuity_penalties(slot_course, day, period, days, periods):
+    """Course continuity penalties for each row of slot arrays (see _slot_penalties).
+    
+    Sorting course-major keys groups each course's slots in (day, period) order, so
+    consecutive entries of one course must share a day (else 50) and be adjacent (else 30).
+    """
+    n_times = days * periods
+    keys = np.sort(slot_course * n_times + day * periods + period, axis=1)
+    course, time = np.divmod(keys, n_times)
+    same_course = course[:, 1:] == course[:, :-1]
+    new_day = time[:, 1:] // periods != time[:, :-1] // periods
+    gap = time[:, 1:] != time[:, :-1] + 1
+    return (50.0 * np.count_nonzero(same_course & new_day, axis=1)
+            + 30.0 * np.count_nonzero(same_course & ~new_day & gap, axis=1))
+
+def _count_duplicates(keys):
+    """Count repeated values in each row of keys.
+    
+    Sorting puts equal keys next to each other, so every equal neighbour pair is one
+    repeat; unlike a bincount this needs no array sized by the key range.
+    """
+    # Packed keys stay below days * periods * max(n_rooms, n_lecturers), so int32 holds
+    # them and halves the data the sort moves
+    keys = np.sort(keys.astype(np.int32), axis=1)
+    return np.count_nonzero(keys[:, 1:] == keys[:, :-1], axis=1)
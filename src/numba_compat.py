@@ -0,0 +1,31 @@
+"""
+Optional Numba support.
+
+When numba is not installed, njit leaves functions as plain Python and prange is range,
+so jitted kernels still import; callers check NUMBA_AVAILABLE to pick a NumPy path instead.
+"""
+import os
+import threading
+
+try:
+    import numba
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+    # Prefer OpenMP, then the built-in workqueue, over TBB: with TBB, a process that
+    # launched parallel kernels from a Streamlit script thread hangs at exit.
+    # An explicit NUMBA_THREADING_LAYER(_PRIORITY) setting still wins
+    if not {'NUMBA_THREADING_LAYER', 'NUMBA_THREADING_LAYER_PRIORITY'} & set(os.environ):
+        numba.config.THREADING_LAYER_PRIORITY = ['omp', 'workqueue', 'tbb']
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Parallel (prange) kernels must not be launched from several threads at once: the
+# workqueue threading layer aborts the process, and Streamlit runs every session's
+# script in its own thread. Callers hold this lock for each kernel launch.
+KERNEL_LOCK = threading.Lock()
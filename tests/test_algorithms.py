@@ -0,0 +1,184 @@
+"""
+Test cases for the optimization algorithms.
+"""
+import pytest
+import numpy as np
+from src.algorithms import pso as pso_module
+from src.algorithms.genetic import GeneticAlgorithm, GeneticAlgorithmConfig
+from src.algorithms.pso import PSO
+
+def count_nonzero_genes(solution):
+    """Toy fitness: number of non-zero genes (optimum is all zeros)."""
+    return float(np.count_nonzero(solution))
+
+def distance_to_target(position):
+    """Toy fitness: squared distance of a position to the point (2, 2, ..., 2)."""
+    return float(np.sum((np.asarray(position) - 2.0) ** 2))
+
+def rounded_distance(position):
+    """Toy discrete fitness: distance_to_target of the rounded position."""
+    return distance_to_target(np.rint(position))
+
+def run_pso(fitness_func, n_iterations=10, **kwargs):
+    """Run a seeded 10-particle PSO in 6 dimensions; return the optimizer and its best position."""
+    pso = PSO(n_particles=10, n_iterations=n_iterations, seed=0, **kwargs)
+    return pso, pso.optimize(fitness_func, 6)
+
+def test_genetic_algorithm_seed_reproducibility():
+    """Test that a seeded genetic algorithm run is reproducible."""
+    config = GeneticAlgorithmConfig(population_size=20, n_generations=10, seed=42)
+    
+    best1 = GeneticAlgorithm(config, count_nonzero_genes).optimize(12)
+    best2 = GeneticAlgorithm(config, count_nonzero_genes).optimize(12)
+    
+    assert np.array_equal(best1, best2)
+
+def test_genetic_algorithm_improves_fitness():
+    """Test that the genetic algorithm finds better than random solutions."""
+    config = GeneticAlgorithmConfig(population_size=30, n_generations=30, seed=0)
+    ga = GeneticAlgorithm(config, count_nonzero_genes)
+    
+    best = ga.optimize(30)
+    
+    # A random chromosome has about 26 non-zero genes out of 30
+    assert count_nonzero_genes(best) == ga.best_fitness
+    assert ga.best_fitness < 20
+
+def test_genetic_algorithm_parallel_matches_serial():
+    """Test that evaluating fitness in worker processes gives the same run as serial."""
+    serial = GeneticAlgorithm(GeneticAlgorithmConfig(population_size=20, n_generations=5, seed=1),
+                              count_nonzero_genes)
+    parallel = GeneticAlgorithm(GeneticAlgorithmConfig(population_size=20, n_generations=5, seed=1,
+                                                       n_processes=2),
+                                count_nonzero_genes)
+    
+    assert np.array_equal(serial.optimize(12), parallel.optimize(12))
+    assert serial.best_fitness == parallel.best_fitness
+
+def test_genetic_algorithm_parallel_after_numba_kernel():
+    """Test that the worker pool starts cleanly after a Numba parallel kernel has run."""
+    if not pso_module.NUMBA_AVAILABLE:
+        pytest.skip("numba is not installed")
+    pso = PSO(n_particles=4, n_iterations=1)
+    pso.optimize(distance_to_target, 3)  # Runs the parallel swarm kernel in this process
+    
+    config = GeneticAlgorithmConfig(population_size=10, n_generations=3, seed=2, n_processes=2)
+    ga = GeneticAlgorithm(config, count_nonzero_genes)
+    best = ga.optimize(9)
+    
+    assert count_nonzero_genes(best) == ga.best_fitness
+
+def test_genetic_algorithm_elite_size_edge_cases():
+    """Test elitism with no elites and with the whole population kept as elites."""
+    for elite_size in (0, 10, 15):
+        config = GeneticAlgorithmConfig(population_size=10, n_generations=3, elite_size=elite_size, seed=0)
+        ga = GeneticAlgorithm(config, count_nonzero_genes)
+        best = ga.optimize(9)
+        
+        assert ga.chromosomes.shape == (10, 9)
+        assert count_nonzero_genes(best) == ga.best_fitness
+
+def test_genetic_algorithm_all_infinite_fitness():
+    """Test that a run where no fitness beats inf finishes without a best chromosome."""
+    for elite_size in (1, 2):
+        config = GeneticAlgorithmConfig(population_size=10, n_generations=3, elite_size=elite_size, seed=0)
+        ga = GeneticAlgorithm(config, lambda chromosome: float('inf'))
+        
+        assert ga.optimize(9) is None
+        assert ga.best_fitness == float('inf')
+
+def test_genetic_algorithm_fitness_cache():
+    """Test that the fitness cache skips re-evaluating duplicates without changing the run."""
+    uncached = GeneticAlgorithm(GeneticAlgorithmConfig(population_size=30, n_generations=20, seed=3),
+                                count_nonzero_genes)
+    cached = GeneticAlgorithm(GeneticAlgorithmConfig(population_size=30, n_generations=20, seed=3,
+                                                     cache_size=100),
+                              count_nonzero_genes)
+    
+    assert np.array_equal(uncached.optimize(6), cached.optimize(6))
+    assert cached.evaluator.n_evaluations < uncached.evaluator.n_evaluations
+    assert len(cached.evaluator.cache) <= 100
+
+def test_pso_improves_fitness():
+    """Test that PSO moves the swarm towards the optimum."""
+    pso = PSO(n_particles=20, n_iterations=50)
+    best = pso.optimize(distance_to_target, 6)
+    
+    assert best.shape == (6,)
+    assert distance_to_target(best) == pso.global_best_fitness
+    assert pso.global_best_fitness < 1.0
+    assert np.all(pso.best_fitness >= pso.global_best_fitness)
+
+def test_pso_all_infinite_fitness():
+    """Test that a run where no fitness beats inf finishes without a best position."""
+    pso = PSO(n_particles=10, n_iterations=3, seed=0)
+    
+    assert pso.optimize(lambda position: float('inf'), 6) is None
+    assert pso.global_best_fitness == float('inf')
+
+def test_pso_seed_reproducibility():
+    """Test that a seeded PSO run is reproducible."""
+    best1 = PSO(n_particles=10, n_iterations=10, seed=42).optimize(distance_to_target, 6)
+    best2 = PSO(n_particles=10, n_iterations=10, seed=42).optimize(distance_to_target, 6)
+    
+    assert np.array_equal(best1, best2)
+
+def test_pso_batched_fitness_matches_per_particle():
+    """Test that a batched fitness function gives the same PSO run as a per-particle one."""
+    def batched_distance(positions):
+        return np.sum((positions - 2.0) ** 2, axis=1)
+    
+    reference, best = run_pso(distance_to_target)
+    pso, batched_best = run_pso(batched_distance, batched=True)
+    
+    np.testing.assert_allclose(batched_best, best)
+    assert pso.global_best_fitness == pytest.approx(reference.global_best_fitness)
+
+def test_pso_parallel_matches_serial():
+    """Test that evaluating particles in worker processes gives the same run as serial."""
+    reference, best = run_pso(distance_to_target, n_iterations=5)
+    pso, parallel_best = run_pso(distance_to_target, n_iterations=5, n_processes=2)
+    
+    np.testing.assert_array_equal(parallel_best, best)
+    assert pso.global_best_fitness == reference.global_best_fitness
+
+def test_pso_discrete_skips_unmoved_particles():
+    """Test that discrete PSO only re-evaluates particles whose rounded position changed."""
+    reference, best = run_pso(rounded_distance, n_iterations=20)
+    pso, discrete_best = run_pso(rounded_distance, n_iterations=20, discrete=True)
+    
+    np.testing.assert_array_equal(discrete_best, best)
+    assert pso.global_best_fitness == reference.global_best_fitness
+    assert reference.evaluator.n_evaluations == 10 * 21
+    assert pso.evaluator.n_evaluations < reference.evaluator.n_evaluations
+
+def test_pso_fitness_cache():
+    """Test that cached PSO fitness gives the same run with fewer evaluations."""
+    reference, best = run_pso(rounded_distance, n_iterations=20, discrete=True)
+    pso, cached_best = run_pso(rounded_distance, n_iterations=20, discrete=True, cache_size=1000)
+    
+    np.testing.assert_array_equal(cached_best, best)
+    assert pso.global_best_fitness == reference.global_best_fitness
+    assert pso.evaluator.n_evaluations < reference.evaluator.n_evaluations
+    assert len(pso.evaluator.cache) <= 1000
+    
+    with pytest.raises(ValueError):
+        PSO(cache_size=10)
+
+def test_pso_swarm_update_numba_matches_numpy(monkeypatch):
+    """Test that the compiled swarm update matches the NumPy update."""
+    if not pso_module.NUMBA_AVAILABLE:
+        pytest.skip("numba is not installed")
+    swarms = []
+    for use_numba in (True, False):
+        monkeypatch.setattr(pso_module, "NUMBA_AVAILABLE", use_numba)
+        pso = PSO(n_particles=8, v_max=1.0)
+        pso.positions = np.random.default_rng(1).uniform(0, 5, size=(8, 6))
+        pso.velocities = np.random.default_rng(2).uniform(-1, 1, size=(8, 6))
+        pso.best_positions = np.random.default_rng(3).uniform(0, 5, size=(8, 6))
+        pso.global_best_position = pso.best_positions[0].copy()
+        pso.update_swarm(np.linspace(0, 1, 8), np.linspace(1, 0, 8))
+        swarms.append((pso.positions, pso.velocities))
+    
+    np.testing.assert_allclose(swarms[0][0], swarms[1][0])
+    np.testing.assert_allclose(swarms[0][1], swarms[1][1])
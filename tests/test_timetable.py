@@ -3,11 +3,13 @@ Test cases for the timetable model.
 """
 import pytest
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from src.models import timetable as timetable_module
 from src.models.timetable import Timetable, Course, Lecturer, TimeSlot
 
-def test_timetable_creation():
-    """Test timetable creation with sample data."""
-    # Create sample data
+@pytest.fixture(scope="module")
+def sample_data():
+    """Sample courses, lecturers and rooms, built once for the module."""
     courses = [
         Course(id=0, name="Math", duration=2, required_rooms=[0, 1], lecturer=0),
         Course(id=1, name="Physics", duration=1, required_rooms=[1, 2], lecturer=1)
@@ -19,34 +21,23 @@ def test_timetable_creation():
     ]
     
     rooms = [0, 1, 2]
-    
-    # Create timetable
-    timetable = Timetable(courses, lecturers, rooms)
-    
+    return courses, lecturers, rooms
+
+@pytest.fixture
+def timetable(sample_data):
+    """A fresh timetable over the sample data, so tests can set its schedule freely."""
+    return Timetable(*sample_data)
+
+def test_timetable_creation(timetable):
+    """Test timetable creation with sample data."""
     # Test initial state
     assert len(timetable.schedule) == 0
     assert len(timetable.courses) == 2
     assert len(timetable.lecturers) == 2
     assert len(timetable.rooms) == 3
 
-def test_timetable_validation():
+def test_timetable_validation(timetable):
     """Test timetable validation with various scenarios."""
-    # Create sample data
-    courses = [
-        Course(id=0, name="Math", duration=2, required_rooms=[0, 1], lecturer=0),
-        Course(id=1, name="Physics", duration=1, required_rooms=[1, 2], lecturer=1)
-    ]
-    
-    lecturers = [
-        Lecturer(id=0, name="Dr. Smith", available_slots=[(0, 0), (0, 1), (1, 0)]),
-        Lecturer(id=1, name="Dr. Jones", available_slots=[(0, 2), (1, 1), (1, 2)])
-    ]
-    
-    rooms = [0, 1, 2]
-    
-    # Create timetable
-    timetable = Timetable(courses, lecturers, rooms)
-    
     # Test valid schedule
     timetable.schedule = {
         0: [
@@ -92,24 +83,8 @@ def test_timetable_validation():
     assert not is_valid
     assert "Lecturer conflict" in message
 
-def test_fitness_calculation():
+def test_fitness_calculation(timetable):
     """Test fitness calculation for different schedules."""
-    # Create sample data
-    courses = [
-        Course(id=0, name="Math", duration=2, required_rooms=[0, 1], lecturer=0),
-        Course(id=1, name="Physics", duration=1, required_rooms=[1, 2], lecturer=1)
-    ]
-    
-    lecturers = [
-        Lecturer(id=0, name="Dr. Smith", available_slots=[(0, 0), (0, 1), (1, 0)]),
-        Lecturer(id=1, name="Dr. Jones", available_slots=[(0, 2), (1, 1), (1, 2)])
-    ]
-    
-    rooms = [0, 1, 2]
-    
-    # Create timetable
-    timetable = Timetable(courses, lecturers, rooms)
-    
     # Test perfect schedule (consecutive slots, same room)
     timetable.schedule = {
         0: [
@@ -136,4 +111,85 @@ def test_fitness_calculation():
     }
     
     fitness = timetable.get_fitness()
-    assert fitness > 0.0  # Penalty for non-consecutive slots 
\ No newline at end of file
+    assert fitness > 0.0  # Penalty for non-consecutive slots 
+
+@pytest.mark.parametrize("use_numba", [True, False])
+def test_batch_fitness_matches_get_fitness(monkeypatch, use_numba, timetable):
+    """Test batch fitness evaluation against the per-schedule fitness."""
+    if use_numba and not timetable_module.NUMBA_AVAILABLE:
+        pytest.skip("numba is not installed")
+    monkeypatch.setattr(timetable_module, "NUMBA_AVAILABLE", use_numba)
+    
+    solutions = np.random.default_rng(0).integers(0, 12, size=(50, 9))
+    for solution, fitness in zip(solutions, timetable.batch_fitness(solutions)):
+        triplets = solution.reshape(-1, 3)
+        slots = [TimeSlot(day=d % 5, period=p % 8, room=r % 3) for d, p, r in triplets]
+        timetable.schedule = {0: slots[:2], 1: slots[2:]}
+        assert fitness == timetable.get_fitness()
+
+def test_batch_fitness_from_several_threads(timetable):
+    """Test concurrent batch fitness calls, as from several Streamlit sessions."""
+    solutions = np.random.default_rng(0).integers(0, 12, size=(200, 9))
+    expected = timetable.batch_fitness(solutions)
+    
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: timetable.batch_fitness(solutions), range(40)))
+    
+    for fitness in results:
+        np.testing.assert_array_equal(fitness, expected)
+
+def test_fitness_with_unknown_lecturer():
+    """Test that both fitness paths reject a course whose lecturer does not exist."""
+    courses = [Course(id=0, name="Math", duration=1, required_rooms=[0], lecturer=5)]
+    lecturers = [Lecturer(id=0, name="Dr. Smith", available_slots=[(0, 0)])]
+    timetable = Timetable(courses, lecturers, rooms=[0])
+    
+    with pytest.raises(ValueError, match="unknown lecturer"):
+        timetable.batch_fitness(np.zeros((2, 3), dtype=np.int8))
+    timetable.schedule = {0: [TimeSlot(day=0, period=0, room=0)]}
+    with pytest.raises(ValueError, match="unknown lecturer"):
+        timetable.get_fitness()
+
+def test_fitness_with_room_ids():
+    """Test fitness when room ids are not 0..len(rooms) - 1."""
+    courses = [Course(id=0, name="Math", duration=1, required_rooms=[10], lecturer=0)]
+    lecturers = [Lecturer(id=0, name="Dr. Smith", available_slots=[(0, 0)])]
+    timetable = Timetable(courses, lecturers, rooms=[10, 11])
+    
+    timetable.schedule = {0: [TimeSlot(day=0, period=0, room=10)]}
+    assert timetable.get_fitness() == 0.0
+    timetable.schedule = {0: [TimeSlot(day=0, period=0, room=11)]}
+    assert timetable.get_fitness() == 100.0  # Invalid room
+    
+    # Room genes index into rooms: 0 -> room 10, 1 -> room 11
+    assert list(timetable.batch_fitness(np.array([[0, 0, 0], [0, 0, 1]]))) == [0.0, 100.0]
+    
+    timetable.schedule = {0: [TimeSlot(day=0, period=0, room=12)]}
+    with pytest.raises(ValueError):
+        timetable.get_fitness()
+
+def test_set_schedule_matches_schedule_dict():
+    """Test that set_schedule and assigning a schedule dict give the same timetable."""
+    courses = [
+        Course(id=3, name="Math", duration=2, required_rooms=[0, 1], lecturer=0),
+        Course(id=7, name="Physics", duration=1, required_rooms=[1, 2], lecturer=1)
+    ]
+    lecturers = [
+        Lecturer(id=0, name="Dr. Smith", available_slots=[(0, 0), (0, 1), (1, 0)]),
+        Lecturer(id=1, name="Dr. Jones", available_slots=[(0, 2), (1, 1), (1, 2)])
+    ]
+    timetable = Timetable(courses, lecturers, rooms=[0, 1, 2])
+    
+    timetable.set_schedule([3, 3, 7], [0, 1, 0], [0, 0, 0], [0, 2, 0])
+    schedule = timetable.schedule
+    assert schedule == {
+        3: [TimeSlot(day=0, period=0, room=0), TimeSlot(day=1, period=0, room=2)],
+        7: [TimeSlot(day=0, period=0, room=0)]
+    }
+    fitness = timetable.get_fitness()
+    assert fitness == 2 * 100 + 100 + 1000 + 50  # Invalid rooms, unavailable, room conflict, split
+    
+    timetable.schedule = {}
+    assert timetable.get_fitness() == 0.0
+    timetable.schedule = schedule
+    assert timetable.get_fitness() == fitness